@@ -1,58 +1,299 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import orjson
+import array
+import glob
+import io
 import os
-import pandas as pd
-import gc
+import sys
+import numpy as np
+import pyarrow.parquet as pq
+import pickle
+import tempfile
+import threading
+
+try:
+    import simdjson
+except ImportError:  # pysimdjson n'est pas disponible sur toutes les plateformes
+    simdjson = None
+
+try:
+    import zstandard
+except ImportError:  # Nécessaire uniquement pour les fichiers .zst
+    zstandard = None
 
 # --- Configuration ---
 # Récupérer l'URL de la fonction et la clé de fonction depuis les variables d'environnement
 AZURE_FUNCTION_ENDPOINT = os.environ.get("AZURE_FUNCTION_ENDPOINT", "http://localhost:7071/api/recommend")
 AZURE_FUNCTION_KEY = os.environ.get("AZURE_FUNCTION_KEY")
+# Timeouts (connexion, lecture) en secondes pour les appels à la fonction
+AZURE_FUNCTION_TIMEOUT = (3, 10)
+# Envoi d'une requête de préchauffage au démarrage pour masquer le cold start de la fonction
+AZURE_FUNCTION_WARMUP = os.environ.get("AZURE_FUNCTION_WARMUP", "1") == "1"
 
-USER_INTERACTIONS_PATH = "processed_data/user_interactions.json"
-ARTICLES_METADATA_PATH = "processed_data/articles_metadata.json"
+# Les fichiers compressés avec zstd (extension .zst) sont décompressés à la lecture
+USER_INTERACTIONS_PATH = os.environ.get("USER_INTERACTIONS_PATH", "processed_data/user_interactions.json")
+ARTICLES_METADATA_PATH = os.environ.get("ARTICLES_METADATA_PATH", "processed_data/articles_metadata.json")
+# Version Parquet des métadonnées (scripts/json_to_parquet.py), utilisée à la place du JSON si elle existe
+ARTICLES_METADATA_PARQUET_PATH = os.environ.get("ARTICLES_METADATA_PARQUET_PATH", "processed_data/articles_metadata.parquet")
+CACHE_DIR = os.environ.get("CACHE_DIR", "cache")
+# À incrémenter quand le format des données mises en cache change
+SIDECAR_VERSION = 3
+ARTICLE_FIELDS = ("title", "category", "url")
+# Champs à faible cardinalité dont les valeurs sont dédupliquées avec sys.intern.
+# Sans effet sur le catalogue actuel, qui ne fournit qu'un category_id entier et pas de champ category.
+INTERNED_ARTICLE_FIELDS = ("category",)
 
 # --- Helper Functions ---
+_parser_local = threading.local()
+
+def parse_json(data):
+    """
+    Parse un document JSON (bytes) avec simdjson si disponible, sinon avec orjson.
+    Le parser simdjson est réutilisé par thread pour amortir l'allocation de ses buffers.
+    """
+    if simdjson is None:
+        return orjson.loads(data)
+    parser = getattr(_parser_local, "parser", None)
+    if parser is None:
+        parser = _parser_local.parser = simdjson.Parser()
+    doc = parser.parse(data)
+    # Les proxies simdjson sont invalidés au prochain parse : on matérialise le résultat
+    if isinstance(doc, simdjson.Array):
+        return doc.as_list()
+    if isinstance(doc, simdjson.Object):
+        return doc.as_dict()
+    return doc
+
+def open_data_file(file_path):
+    """
+    Ouvre un fichier de données en lecture binaire, en le décompressant à la volée s'il se termine par .zst.
+    """
+    if not file_path.endswith(".zst"):
+        return open(file_path, 'rb')
+    if zstandard is None:
+        raise ImportError(f"The zstandard package is required to read {file_path}")
+    return io.BufferedReader(zstandard.open(file_path, 'rb'))
+
+def sidecar_path(file_path, extension):
+    """
+    Chemin du fichier cache associé à file_path, identifié par sa date de modification et sa taille.
+    """
+    stat = os.stat(file_path)
+    version = f"v{SIDECAR_VERSION}-{stat.st_mtime_ns:x}-{stat.st_size:x}"
+    return os.path.join(CACHE_DIR, f"{os.path.basename(file_path)}.{version}.{extension}")
+
+def load_sidecar(file_path, extension="pkl"):
+    """
+    Charge le résultat déjà parsé de file_path depuis le cache disque, ou None s'il n'existe pas.
+    Les sidecars "npy" contiennent un tableau numpy, les sidecars "pkl" un objet picklé.
+    """
+    try:
+        with open(sidecar_path(file_path, extension), 'rb') as f:
+            if extension == "npy":
+                return np.load(f)
+            return pickle.load(f)
+    except Exception:
+        # Sidecar corrompu ou d'un autre format : il sera régénéré depuis la source
+        return None
+
+def save_sidecar(file_path, data, extension="pkl"):
+    """
+    Écrit le résultat parsé de file_path dans le cache disque (écriture atomique).
+    """
+    tmp_path = None
+    try:
+        path = sidecar_path(file_path, extension)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            if extension == "npy":
+                np.save(f, data)
+            else:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        tmp_path = None
+    except OSError:
+        # Le cache disque est une optimisation : une erreur d'écriture n'est pas bloquante
+        return
+    finally:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    # Supprimer les sidecars des versions précédentes du même fichier
+    pattern = f"{glob.escape(os.path.basename(file_path))}.v*.{extension}"
+    for old_path in glob.glob(os.path.join(glob.escape(CACHE_DIR), pattern)):
+        if old_path != path:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
 @st.cache_data
-def load_data_from_local(file_path, is_json_lines=False):
+def load_user_ids_from_local(file_path):
     """
-    Charge des données depuis un fichier local.
+    Extrait la liste triée des user_id d'un fichier JSON Lines d'interactions.
+    Seul le champ user_id de chaque ligne est matérialisé.
     """
+    cached = load_sidecar(file_path, "npy")
+    if cached is not None:
+        return cached.tolist()
+    # Tampon d'entiers C contigu : la déduplication est faite ensuite par numpy
+    user_ids = array.array('i')
     try:
-        if is_json_lines:
-            data = []
-            with open(file_path, 'r') as f:
+        with open_data_file(file_path) as f:
+            if simdjson is not None:
+                parser = simdjson.Parser()
                 for line in f:
-                    data.append(json.loads(line))
-            return data
-        else:
-            with open(file_path, 'r') as f:
-                return json.load(f)
+                    user_ids.append(parser.parse(line).at_pointer('/user_id'))
+            else:
+                for line in f:
+                    user_ids.append(orjson.loads(line)['user_id'])
+    except ValueError as e:
+        st.error(f"Could not decode JSON from {file_path}: {e}")
+        return None
+    except Exception as e:
+        st.error(f"An unexpected error occurred while loading {file_path} from local file: {e}")
+        return None
+    # np.unique trie et déduplique en une seule passe
+    user_ids = np.unique(np.frombuffer(user_ids, dtype=np.int32))
+    save_sidecar(file_path, user_ids, "npy")
+    return user_ids.tolist()
+
+def is_articles_metadata(data):
+    """
+    Vérifie que data a la structure produite par load_articles_metadata (index id_to_row et une liste par champ).
+    """
+    return (
+        isinstance(data, dict)
+        and isinstance(data.get("id_to_row"), dict)
+        and all(isinstance(data.get(field), list) for field in ARTICLE_FIELDS)
+    )
+
+@st.cache_resource
+def load_articles_metadata(file_path):
+    """
+    Charge les métadonnées des articles en colonnes (une liste par champ de ARTICLE_FIELDS)
+    avec un index id_to_row qui associe chaque article_id à sa ligne.
+    L'objet retourné est partagé entre toutes les sessions : il doit être traité en lecture seule.
+    """
+    if file_path.endswith(".parquet"):
+        return load_articles_metadata_from_parquet(file_path)
+    cached = load_sidecar(file_path)
+    if is_articles_metadata(cached):
+        return cached
+    articles_metadata = {"id_to_row": {}}
+    articles_metadata.update({field: [] for field in ARTICLE_FIELDS})
+    try:
+        # Lecture ligne par ligne : seul l'article courant est matérialisé en dict
+        with open_data_file(file_path) as f:
+            for line in f:
+                article = parse_json(line)
+                # Position réelle de la ligne : un article_id en double pointe vers sa dernière occurrence
+                articles_metadata["id_to_row"][int(article['article_id'])] = len(articles_metadata[ARTICLE_FIELDS[0]])
+                for field in ARTICLE_FIELDS:
+                    value = article.get(field)
+                    if field in INTERNED_ARTICLE_FIELDS and isinstance(value, str):
+                        value = sys.intern(value)
+                    articles_metadata[field].append(value)
+    except ValueError as e:
+        st.error(f"Could not decode JSON from {file_path}: {e}")
+        return None
     except Exception as e:
         st.error(f"An unexpected error occurred while loading {file_path} from local file: {e}")
         return None
+    if not articles_metadata["id_to_row"]:
+        return None
 
-def optimize_dataframe_memory(df):
+    save_sidecar(file_path, articles_metadata)
+    return articles_metadata
+
+def load_articles_metadata_from_parquet(file_path):
+    """
+    Construit les colonnes de métadonnées des articles depuis un fichier Parquet, sans passer par le JSON.
+    Retourne None si le fichier est illisible, pour que l'appelant se rabatte sur le JSON.
+    """
+    try:
+        schema_names = pq.read_schema(file_path).names
+        columns = ['article_id'] + [field for field in ARTICLE_FIELDS if field in schema_names]
+        table = pq.read_table(file_path, columns=columns)
+        # Mêmes clés entières que le chargement JSON, quel que soit le type de la colonne
+        id_to_row = {int(article_id): row for row, article_id in enumerate(table.column('article_id').to_pylist())}
+    except Exception:
+        return None
+    if table.num_rows == 0:
+        return None
+    articles_metadata = {"id_to_row": id_to_row}
+    for field in ARTICLE_FIELDS:
+        if field not in table.column_names:
+            articles_metadata[field] = [None] * table.num_rows
+            continue
+        values = table.column(field).to_pylist()
+        if field in INTERNED_ARTICLE_FIELDS:
+            values = [sys.intern(value) if isinstance(value, str) else value for value in values]
+        articles_metadata[field] = values
+    return articles_metadata
+
+def load_articles_metadata_preferring_parquet():
     """
-    Optimise la mémoire utilisée par un DataFrame pandas.
+    Charge les métadonnées depuis le fichier Parquet s'il existe et n'est pas plus ancien que le JSON,
+    sinon (ou s'il est illisible) depuis le fichier JSON.
     """
-    for col in df.columns:
-        if df[col].dtype == 'float64':
-            df[col] = df[col].astype('float32')
-        if df[col].dtype == 'int64':
-            df[col] = df[col].astype('int32')
-    return df
+    if os.path.exists(ARTICLES_METADATA_PARQUET_PATH):
+        if os.path.exists(ARTICLES_METADATA_PATH) and os.path.getmtime(ARTICLES_METADATA_PARQUET_PATH) < os.path.getmtime(ARTICLES_METADATA_PATH):
+            st.warning(f"{ARTICLES_METADATA_PARQUET_PATH} is older than {ARTICLES_METADATA_PATH}; using the JSON file. Re-run scripts/json_to_parquet.py to refresh it.")
+        else:
+            articles_metadata = load_articles_metadata(ARTICLES_METADATA_PARQUET_PATH)
+            if articles_metadata:
+                return articles_metadata
+            st.warning(f"Could not read article metadata from {ARTICLES_METADATA_PARQUET_PATH}; falling back to {ARTICLES_METADATA_PATH}.")
+    return load_articles_metadata(ARTICLES_METADATA_PATH)
+
+def get_article_info(articles_metadata, article_id):
+    """
+    Retourne les champs renseignés de l'article article_id, ou None s'il est inconnu.
+    """
+    if not articles_metadata:
+        return None
+    if isinstance(article_id, bool):
+        # bool est une sous-classe de int : true/false dans la réponse ne désignent aucun article
+        return None
+    if not isinstance(article_id, int):
+        try:
+            article_id = int(article_id)
+        except (TypeError, ValueError):
+            # Identifiant mal formé renvoyé par la fonction : traité comme un article inconnu
+            return None
+    row = articles_metadata["id_to_row"].get(article_id)
+    if row is None:
+        return None
+    return {field: articles_metadata[field][row] for field in ARTICLE_FIELDS if articles_metadata[field][row] is not None}
+
+@st.cache_resource
+def get_http_session():
+    """
+    Session HTTP partagée entre les reruns pour réutiliser les connexions (keep-alive) vers la fonction.
+    Les en-têtes communs (dont la clé de fonction) sont définis une seule fois sur la session.
+    """
+    session = requests.Session()
+    session.headers["Content-Type"] = "application/json"
+    if AZURE_FUNCTION_KEY:
+        session.headers["x-functions-key"] = AZURE_FUNCTION_KEY
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 def get_recommendations(user_id, n_recommendations=5):
     """Calls the Azure Function to get recommendations."""
-    headers = {
-        "Content-Type": "application/json",
-        "x-functions-key": AZURE_FUNCTION_KEY
-    }
     payload = {"user_id": user_id, "n_recommendations": n_recommendations}
     try:
-        response = requests.post(AZURE_FUNCTION_ENDPOINT, headers=headers, json=payload)
+        response = get_http_session().post(AZURE_FUNCTION_ENDPOINT, json=payload, timeout=AZURE_FUNCTION_TIMEOUT)
         response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
         return response.json()
     except requests.exceptions.ConnectionError:
@@ -71,6 +312,26 @@ def get_recommendations(user_id, n_recommendations=5):
         st.error("Error: Could not decode JSON response from the Azure Function.")
         return None
 
+@st.cache_resource
+def warm_up_azure_function(user_id):
+    """
+    Envoie une fois par processus, en arrière-plan, une requête minimale à la fonction
+    pour qu'elle soit déjà démarrée lors du premier vrai appel.
+    """
+    session = get_http_session()
+    payload = {"user_id": user_id, "n_recommendations": 1}
+
+    def ping():
+        try:
+            session.post(AZURE_FUNCTION_ENDPOINT, json=payload, timeout=AZURE_FUNCTION_TIMEOUT)
+        except requests.exceptions.RequestException:
+            # Le préchauffage est facultatif : les erreurs seront signalées lors du vrai appel
+            pass
+
+    thread = threading.Thread(target=ping, daemon=True)
+    thread.start()
+    return thread
+
 # --- Streamlit App Layout ---
 st.set_page_config(layout="wide", page_title="Article Recommender")
 
@@ -78,37 +339,14 @@ st.title("Article Recommender System")
 st.markdown("---")
 
 # Load data
-user_interactions_list = load_data_from_local(USER_INTERACTIONS_PATH, is_json_lines=True)
-user_interactions = pd.DataFrame(user_interactions_list)
-user_interactions = optimize_dataframe_memory(user_interactions)
-
-articles_metadata_list = load_data_from_local(ARTICLES_METADATA_PATH, is_json_lines=True)
-articles_metadata = pd.DataFrame(articles_metadata_list)
-articles_metadata = optimize_dataframe_memory(articles_metadata)
-
-if user_interactions is not None:
-    user_ids = sorted(list(set(user_interactions['user_id'])))
-else:
-    user_ids = []
-
-if articles_metadata is not None:
-    articles_metadata_dict = {str(article['article_id']): article for article in articles_metadata.to_dict('records')}
-else:
-    articles_metadata_dict = {}
-
-# Libérer la mémoire
-del user_interactions_list
-del articles_metadata_list
-del user_interactions
-del articles_metadata
-gc.collect()
+user_ids = load_user_ids_from_local(USER_INTERACTIONS_PATH) or []
 
 if not user_ids:
     st.warning("No user IDs found or an error occurred loading them. Cannot proceed.")
     st.stop()
 
-if not articles_metadata_dict:
-    st.warning("No article metadata found or an error occurred loading it. Recommendations will not show full details.")
+if AZURE_FUNCTION_WARMUP:
+    warm_up_azure_function(user_ids[0])
 
 # User selection
 st.header("Get Recommendations")
@@ -124,21 +362,28 @@ if st.button("Get 5 Recommendations"):
             st.subheader(f"Recommendations for User ID: {selected_user_id}")
 
             if isinstance(recommendations, list) and recommendations:
+                # Les métadonnées ne sont chargées qu'au premier affichage de recommandations
+                articles_metadata = load_articles_metadata_preferring_parquet()
+                if not articles_metadata:
+                    st.warning("No article metadata found or an error occurred loading it. Recommendations will not show full details.")
+
                 # Create columns for a card-like display
                 cols = st.columns(3) # Adjust number of columns as needed
 
                 for i, rec_article_id in enumerate(recommendations):
                     with cols[i % 3]: # Distribute cards across columns
-                        article_info = articles_metadata_dict.get(str(rec_article_id)) # Ensure key is string if IDs are strings
-                        if article_info:
-                            st.markdown(f"**Title:** {article_info.get('title', 'N/A')}")
-                            st.markdown(f"**Category:** {article_info.get('category', 'N/A')}")
-                            st.markdown(f"**URL:** [Link]({article_info.get('url', '#')})")
-                            st.markdown("---")
+                        article_info = get_article_info(articles_metadata, rec_article_id)
+                        # Un seul st.markdown par carte pour limiter les messages envoyés au frontend
+                        if article_info is not None:
+                            st.markdown(
+                                f"**Title:** {article_info.get('title', 'N/A')}\n\n"
+                                f"**Category:** {article_info.get('category', 'N/A')}\n\n"
+                                f"**URL:** [Link]({article_info.get('url', '#')})\n\n"
+                                "---"
+                            )
                         else:
                             st.warning(f"Details for article ID {rec_article_id} not found.")
-                            st.markdown(f"**Article ID:** {rec_article_id}")
-                            st.markdown("---")
+                            st.markdown(f"**Article ID:** {rec_article_id}\n\n---")
             else:
                 st.info("No recommendations returned for this user.")
         else:
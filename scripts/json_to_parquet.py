@@ -0,0 +1,46 @@
+"""
+Convertit le fichier JSON Lines des métadonnées d'articles en Parquet.
+
+Le fichier produit est lu directement par app.py (ARTICLES_METADATA_PARQUET_PATH),
+ce qui évite de parser le JSON au démarrage.
+
+Usage :
+    python scripts/json_to_parquet.py [source.json] [destination.parquet]
+"""
+import sys
+
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+SOURCE_PATH = "processed_data/articles_metadata.json"
+DESTINATION_PATH = "processed_data/articles_metadata.parquet"
+
+# Colonnes texte à faible cardinalité stockées en dictionary encoding
+# (ignorées si absentes : le catalogue actuel n'a qu'un category_id entier)
+DICTIONARY_COLUMNS = ("category",)
+
+def convert(source_path, destination_path):
+    """
+    Lit source_path (une ligne JSON par article) et écrit la table Parquet correspondante.
+    """
+    with open(source_path, 'rb') as f:
+        articles = [orjson.loads(line) for line in f if line.strip()]
+    # Union des clés de tous les articles : un champ absent de la première ligne est conservé
+    # (from_pylist ne retiendrait que les clés du premier enregistrement)
+    keys = {"article_id": None}
+    for article in articles:
+        keys.update(dict.fromkeys(article))
+    table = pa.table({key: [article.get(key) for article in articles] for key in keys})
+    for name in DICTIONARY_COLUMNS:
+        if name in table.column_names and pa.types.is_string(table.schema.field(name).type):
+            index = table.column_names.index(name)
+            table = table.set_column(index, name, table.column(name).dictionary_encode())
+    pq.write_table(table, destination_path, compression="zstd")
+    return table.num_rows
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else SOURCE_PATH
+    destination = sys.argv[2] if len(sys.argv) > 2 else DESTINATION_PATH
+    n_rows = convert(source, destination)
+    print(f"{n_rows} articles written to {destination}")